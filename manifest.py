@@ -0,0 +1,8 @@
+# Freeze the script, the mode classes, the morse code table and the adjustment
+# modes into the firmware image. opt=3 leaves out the line numbers, which saves
+# flash space.
+freeze(
+    ".",
+    ("morse.py", "morse_modes.py", "morse_table.py", "morse_submodes.py"),
+    opt=3,
+)
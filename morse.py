@@ -6,15 +6,15 @@ For user documentation of this script see file morse.md
 
 """
 
+import micropython
+import uasyncio
 from time import sleep
-from utime import ticks_diff, ticks_ms
+from utime import ticks_add, ticks_diff, ticks_ms
 from europi import (
     oled,
     CHAR_WIDTH,
-    CHAR_HEIGHT,
     din,
     ain,
-    k1,
     b1,
     b2,
     cv1,
@@ -25,46 +25,36 @@ from europi import (
     cv6,
 )
 from europi_script import EuroPiScript
+from micropython import const
+from morse_modes import (
+    Mode,
+    OLED_WIDTH,
+    _oled_text,
+    _oled_fill_rect,
+)
+from morse_table import (
+    DEFAULT_PITCH_CV,
+    EOW_KIND,
+    EOM_KIND,
+    morse_code,
+    EOC_MC,
+    EOW_MC,
+    EOM_MC,
+)
 
 VERSION = "0.6"
 
 # UI timing
 
-SAVE_STATE_INTERVAL = 5000
-SHORT_PRESSED_INTERVAL = 600  # feels about 1 second
-LONG_PRESSED_INTERVAL = 2400  # feels about 4 seconds
-
-BLINK_MS = 700
-BLINK_RATIO = 2
+_SAVE_STATE_INTERVAL = const(5000)
+_SHORT_PRESSED_INTERVAL = const(600)  # feels about 1 second
+_LONG_PRESSED_INTERVAL = const(2400)  # feels about 4 seconds
 
 # Threshold for analog input to specify text index
 AIN_TEXTCHANGE_THRESHOLD = 0.1
 
-# Display properties
-OLED_CHARS_PER_LINE = int(oled.width / CHAR_WIDTH)
-
-# Morse code timing
-# See https://en.wikipedia.org/wiki/Morse_code#Representation,_timing,_and_speeds or
-#     https://de.wikipedia.org/wiki/Morsecode#Zeitschema_und_Veranschaulichung
-DIT_LEN = 1
-DAH_LEN = 3 * DIT_LEN
-SYM_GAP_LEN = DIT_LEN
-EOC_GAP_LEN = 3 * DIT_LEN
-EOW_GAP_LEN = 7 * DIT_LEN
-EOM_GAP_LEN = 7 * DIT_LEN
-
-# Morse code encoding
-DIT = "."
-DAH = "_"
-
-# "Morse code is often at a frequency between 600 and 800 Hz"
-# (see https://www.johndcook.com/blog/2022/02/25/morse-code-in-musical-notation)
-# a good value is e.g. PITCH_CV = 4.33, which is roughly E4 (659 Hz)
-# So we make the pitch adjustable with K1 and give it some variablilty
-DEFAULT_PITCH_CV = 4.333  # roughly E4 (659 Hz)
-MIN_PITCH_CV = 3.250  # roughly Eb3 (311 Hz)
-MAX_PITCH_CV = 5.0  # roughly C5 (1047 Hz)
-PITCH_CV_STEPS = int((MAX_PITCH_CV - MIN_PITCH_CV) * 12)
+# Maximum time between two reads of the analog input in RUNNING mode
+_AIN_POLL_MS = const(100)
 
 # Word separator
 EOW_CHAR = " "
@@ -78,97 +68,8 @@ EOM_OUT = cv5
 RUNNING_OUT = cv6
 
 
-class MorseCharacter:
-    def __init__(self, char, sequence):
-        self.char = char
-        self.sequence = sequence
-        if char != "EOC" and char != "EOM":
-            self.sequence = " ".join(self.sequence)
-        self.gates = []
-        for sym in self.sequence:
-            self.gates.extend(
-                [True] * DIT_LEN
-                if sym == DIT
-                else [True] * DAH_LEN
-                if sym == DAH
-                else [False] * SYM_GAP_LEN
-            )
-        self.duration = len(self.gates)
-
-
-MORSE_CHARACTERS = [
-    # latin letters
-    MorseCharacter("A", "._"),
-    MorseCharacter("B", "_..."),
-    MorseCharacter("C", "_._."),
-    MorseCharacter("D", "_.."),
-    MorseCharacter("E", "."),
-    MorseCharacter("F", ".._."),
-    MorseCharacter("G", "__."),
-    MorseCharacter("H", "...."),
-    MorseCharacter("I", ".."),
-    MorseCharacter("J", ".___"),
-    MorseCharacter("K", "_._"),
-    MorseCharacter("L", "._.."),
-    MorseCharacter("M", "__"),
-    MorseCharacter("N", "_."),
-    MorseCharacter("O", "___"),
-    MorseCharacter("P", ".__."),
-    MorseCharacter("Q", "__._"),
-    MorseCharacter("R", "._."),
-    MorseCharacter("S", "..."),
-    MorseCharacter("T", "_"),
-    MorseCharacter("U", ".._"),
-    MorseCharacter("V", "..._"),
-    MorseCharacter("W", ".__"),
-    MorseCharacter("X", "_.._"),
-    MorseCharacter("Y", "_.__"),
-    MorseCharacter("Z", "__.."),
-    # digits
-    MorseCharacter("1", ".____"),
-    MorseCharacter("2", "..___"),
-    MorseCharacter("3", "...__"),
-    MorseCharacter("4", "...._"),
-    MorseCharacter("5", "....."),
-    MorseCharacter("6", "_...."),
-    MorseCharacter("7", "__..."),
-    MorseCharacter("8", "___.."),
-    MorseCharacter("9", "____."),
-    MorseCharacter("0", "_____"),
-    # umlauts and ligatures - not fully imlemented
-    MorseCharacter("Á", ".__._"),
-    MorseCharacter("Ä", "._._"),
-    MorseCharacter("É", ".._.."),
-    MorseCharacter("Ñ", "__.__"),
-    MorseCharacter("Ö", "___."),
-    MorseCharacter("Ü", "..__"),
-    # symbols
-    MorseCharacter(".", "._._._"),  # AAA
-    MorseCharacter(",", "__..__"),  # MIM
-    MorseCharacter(":", "___..."),  # OS
-    MorseCharacter(";", "_._._."),  # NNN
-    MorseCharacter("?", "..__.."),  # IMI
-    MorseCharacter("!", "_._.__"),
-    MorseCharacter("-", "_...._"),  # BA
-    MorseCharacter("_", "..__._"),  # UK
-    MorseCharacter("(", "_.__."),  # KN
-    MorseCharacter(")", "_.__._"),  # KK
-    MorseCharacter("'", ".____."),  # JN
-    MorseCharacter("=", "_..._"),  # BT
-    MorseCharacter("+", "._._."),  # AR
-    MorseCharacter("/", "_.._."),  # DN
-    MorseCharacter("@", ".__._."),  # AC
-    MorseCharacter('"', "._.._."),
-]
-
-MORSE_CODE = {mc.char: mc for mc in MORSE_CHARACTERS}
-EOC_MC = MorseCharacter("EOC", " " * EOC_GAP_LEN)
-EOW_MC = MorseCharacter("EOW", " " * EOW_GAP_LEN)
-EOM_MC = MorseCharacter("EOM", " " * EOM_GAP_LEN)
-ERROR_MC = MorseCharacter("ERROR", "." * 8)
-
 DEFAULT_STATE = [
-    f"{DEFAULT_PITCH_CV}",
+    str(DEFAULT_PITCH_CV),
     "0",
     "HELLO WORLD",
     "TEMPUS FUGIT",
@@ -184,97 +85,82 @@ DEFAULT_STATE = [
 ]
 
 
+@micropython.viper
+def _outputs_at(frames: ptr8, index: int) -> int:
+    """Output flags of dit index: gate | eoc << 1 | eow << 2 | eom << 3.
+
+    frames holds the flags of two dits per byte, the even dit in the low nibble.
+    """
+    return (frames[index >> 1] >> ((index & 1) << 2)) & 15
+
+
 class State:
     def __init__(self, state_str):
         if state_str:
             lines = state_str.splitlines()
         else:
             lines = DEFAULT_STATE
-        self._pitch_cv = float(lines[0])
-        self._text_index = int(lines[1])
-        self.texts = lines[2:]
+        self.pitch_cv = float(lines[0])
+        self.text_index = int(lines[1])
+        self.texts = tuple(lines[2:])
         self.saved = True
+        # the texts are immutable, so their segments never become stale
+        self._segments_cache = {}
 
-    @property
-    def pitch_cv(self):
-        return self._pitch_cv
-
-    @pitch_cv.setter
-    def pitch_cv(self, value):
-        self._pitch_cv = value
+    def mark_dirty(self):
+        """To be called after changing pitch_cv or text_index."""
         self.saved = False
 
-    @property
-    def text_index(self):
-        return self._text_index
-
-    @text_index.setter
-    def text_index(self, value):
-        self._text_index = value
-        self.saved = False
+    def segments(self, index):
+        """The (character_tick, mc) pairs of the text with the given index, in order.
+
+        Spaces become EOW_MC, other characters are separated by EOC_MC and the
+        text is terminated by EOM_MC. The result is cached per text.
+        """
+        segments = self._segments_cache.get(index)
+        if segments is None:
+            text = self.texts[index]
+            segments = []
+            after_char = False  # EOC_MC is only needed between two characters
+            for character_tick, char in enumerate(text):
+                if char == EOW_CHAR:
+                    segments.append((character_tick, EOW_MC))
+                    after_char = False
+                else:
+                    if after_char:
+                        segments.append((character_tick - 1, EOC_MC))
+                    segments.append((character_tick, morse_code(char)))
+                    after_char = True
+            if text:
+                segments.append((len(text) - 1, EOM_MC))
+            self._segments_cache[index] = segments
+        return segments
+
+    def compile_text(self, index):
+        """Compile the text with the given index into its complete morse sequence.
+
+        Returns the tuple (frames, segments, length). frames holds the gate, eoc,
+        eow and eom flags for each of the length dits of the sequence (see
+        _outputs_at), segments are the segments() of the text.
+        """
+        segments = self.segments(index)
+        length = sum(mc.duration for _, mc in segments)
+        frames = bytearray((length + 1) >> 1)
+        tick = 0
+        for _, mc in segments:
+            for dit_tick in range(mc.duration):
+                flags = (
+                    (mc.gates_bits >> dit_tick) & 1
+                    | ((mc.eoc_bits >> dit_tick) & 1) << 1
+                    | ((mc.eow_bits >> dit_tick) & 1) << 2
+                    | ((mc.eom_bits >> dit_tick) & 1) << 3
+                )
+                frames[tick >> 1] |= flags << ((tick & 1) << 2)
+                tick += 1
+        return frames, segments, length
 
     def serialize(self):
-        return f"{self._pitch_cv:1.3f}\n{self._text_index}\n" + "\n".join(self.texts)
-
-
-class Mode:
-    def __init__(self, name, state):
-        self.name = name
-        self.state = state
-        self.blink_on = False
-
-    def current_text(self):
-        return self.state.texts[self.state.text_index]
-
-    def clock(self):
-        pass
-
-    def reset_clock(self):
-        pass
-
-    def b1_klick(self):
-        return self
-
-    def b1_short_press(self):
-        return self
-
-    def b1_long_press(self):
-        return self
-
-    def b2_klick(self):
-        return self
-
-    def b2_short_press(self):
-        return self
-
-    def b2_long_press(self):
-        return self
-
-    def blink_triggered(self, blink_state):
-        pass
-
-    def blink(self):
-        on = (ticks_ms() % BLINK_MS) < (BLINK_MS / BLINK_RATIO)
-        if self.blink_on != on:
-            self.blink_on = on
-            self.blink_triggered(on)
-
-    def update_state(self):
-        self.blink()
-
-    def paint_centered_text(self, line, content):
-        x = int((oled.width - (len(content) * CHAR_WIDTH)) / 2)
-        y = int((line * (CHAR_HEIGHT + 1)) + 1)
-        oled.text(f"{content}", x, y)
-
-    def paint_display(self):
-        self.paint_titleline()
-        self.paint_content()
-
-    def update_display(self):
-        oled.fill(0)
-        self.paint_display()
-        oled.show()
+        return "\n".join((f"{self.pitch_cv:1.3f}", str(self.text_index)) + self.texts)
 
 
 class MainMode(Mode):
@@ -282,9 +168,13 @@ class MainMode(Mode):
         super().__init__(name, state)
 
     def b1_short_press(self):
+        from morse_submodes import ChangeCV
+
         return ChangeCV(self)
 
     def b2_klick(self):
+        from morse_submodes import ChangeText
+
         return ChangeText(self)
 
 
@@ -292,10 +182,7 @@ class Paused(MainMode):
     def __init__(self, state):
         super().__init__("PAUSED", state)
         self.all_outputs_off()
-        self.display_text_offset = 0
-        self.number_of_overflow_characters = (
-            len(self.current_text()) - OLED_CHARS_PER_LINE
-        )
+        self.reset_clock()
 
     def b1_klick(self):
         return Running(self.state)
@@ -303,6 +190,10 @@ class Paused(MainMode):
     def clock(self):
         pass
 
+    def reset_clock(self):
+        self.windows = self.text_windows(self.current_text())
+        self.display_text_offset = 0
+
     def all_outputs_off(self):
         GATE_OUT.off()
         PITCH_OUT.off()
@@ -312,211 +203,236 @@ class Paused(MainMode):
         RUNNING_OUT.off()
 
     def blink_triggered(self, blink_state):
-        if blink_state and self.number_of_overflow_characters > 0:
-            self.display_text_offset = (self.display_text_offset + 1) % (
-                self.number_of_overflow_characters + 1
-            )
+        if blink_state:
+            self.scroll_windows()
+        self.display_data_changed = True
 
     def paint_titleline(self):
-        self.paint_centered_text(
-            0,
-            self.current_text()[
-                self.display_text_offset : self.display_text_offset
-                + OLED_CHARS_PER_LINE
-            ],
-        )
+        self.paint_centered_text(0, self.windows[self.display_text_offset])
 
     def paint_content(self):
         if self.blink_on:
-            oled.fill_rect(59, 18, 4, 8, 1)
-            oled.fill_rect(65, 18, 4, 8, 1)
+            _oled_fill_rect(59, 18, 4, 8, 1)
+            _oled_fill_rect(65, 18, 4, 8, 1)
 
 
 class Running(MainMode):
     def __init__(self, state):
         super().__init__("RUNNING", state)
+        self._gate_value = GATE_OUT.value
+        self._eoc_value = EOC_OUT.value
+        self._eow_value = EOW_OUT.value
+        self._eom_value = EOM_OUT.value
+        # last values written to the outputs, None forces the first write
+        self._last_gate = None
+        self._last_end_flags = None
         self.reset_clock()
+        self.update_pitch()
         RUNNING_OUT.on()
 
     def b1_klick(self):
         return Paused(self.state)
 
-    def cache_text_and_mc_data(self):
-        max_index = len(self.current_text()) - 1
-        self.prefix = self.current_text()[0 : self.character_tick]
-        self.current_char = (
-            self.current_text()[self.character_tick]
-            if self.character_tick <= max_index
-            else ""
-        )
-        self.postfix = (
-            self.current_text()[self.character_tick + 1 :]
-            if self.character_tick < max_index
-            else ""
-        )
-        self.dits_in_char = self.mc.duration
-        self.gates = self.mc.gates
-        self.gate = False
+    def compile_titles(self, text):
+        """(prefix, current_char, x_prefix, x_current_char) for each character_tick."""
+        titles = []
+        for character_tick in range(len(text)):
+            prefix = text[0:character_tick]
+            current_char = text[character_tick]
+            x_center = self.centered_x(current_char)
+            x_for_prefix = len(prefix) * CHAR_WIDTH
+            x_current_char = min(max(x_center, x_for_prefix), OLED_WIDTH - CHAR_WIDTH)
+            titles.append(
+                (prefix, current_char, x_current_char - x_for_prefix, x_current_char)
+            )
+        return titles
+
+    def compile_renders(self, segments):
+        """Rendered sequence and char of each morse character with their x positions."""
+        mc_renders = {}
+        for mc in [EOC_MC] + [mc for _, mc in segments]:
+            if mc not in mc_renders:
+                mc_renders[mc] = (
+                    self.render_text(mc.sequence),
+                    self.centered_x(mc.sequence),
+                    self.render_text(mc.char) if mc.kind >= EOW_KIND else None,
+                    self.centered_x(mc.char),
+                )
+        return mc_renders
+
+    def compile_text(self, index):
+        """Compile everything needed to morse the text with the given index.
+
+        The result is activated with use_text(). Compiling is too slow for the
+        clock interrupt, so a text selected by the analog input is compiled in
+        the main loop and only activated by the interrupt.
+        """
+        frames, segments, length = self.state.compile_text(index)
+        titles = self.compile_titles(self.state.texts[index])
+        mc_renders = self.compile_renders(segments)
+        # (mc, tick of the next transition, title, mc_rendered) for each
+        # segment, the last one wraps around to the start of the sequence
+        transitions = []
+        end_tick = 0
+        for character_tick, mc in segments:
+            end_tick += mc.duration
+            transitions.append(
+                (mc, end_tick % length, titles[character_tick], mc_renders[mc])
+            )
+        return index, frames, length, transitions, (titles[-1], mc_renders[EOC_MC])
+
+    def use_text(self, compiled):
+        (
+            self.compiled_index,
+            self.output_frames,
+            self.length,
+            self.transitions,
+            self.idle_display,
+        ) = compiled
 
     def reset_clock(self):
-        self.character_tick = -1
-        self.dit_tick = -1
-        self.dits_in_char = 1
+        self.use_text(self.compile_text(self.state.text_index))
+        self.next_text = None
+        self.next_ain_ticks = ticks_ms()
+        self.tick = -1
+        self.segment = -1
+        self.next_segment_tick = 0
         self.mc = EOC_MC
-        self.cache_text_and_mc_data()
+        self.title, self.mc_rendered = self.idle_display
+        self.gate = False
 
     def read_analogue_input(self):
         analog_percent = ain.percent()
         if analog_percent > AIN_TEXTCHANGE_THRESHOLD:
-            self.state.text_index = int(
-                (analog_percent - AIN_TEXTCHANGE_THRESHOLD) * len(self.state.texts)
-            )
+            state = self.state
+            index = int((analog_percent - AIN_TEXTCHANGE_THRESHOLD) * len(state.texts))
+            if index != state.text_index:
+                state.text_index = index
+                state.mark_dirty()
 
-    def handle_end_of_character(self):
-        nextctick = self.character_tick + 1
-        if self.mc != EOM_MC and nextctick == len(self.current_text()):
-            self.mc = EOM_MC
-        elif (
-            nextctick < len(self.current_text())
-            and self.current_text()[nextctick] == EOW_CHAR
-        ):
-            self.character_tick = nextctick
-            self.mc = EOW_MC
-        elif self.mc == EOC_MC or self.mc == EOW_MC or self.mc == EOM_MC:
-            self.character_tick = nextctick % len(self.current_text())
-            if self.character_tick == 0:
-                self.read_analogue_input()
-            self.mc = MORSE_CODE[self.current_text()[self.character_tick]]
-        else:
-            self.mc = EOC_MC
-        self.cache_text_and_mc_data()
+    def update_state(self):
+        super().update_state()
+        now = ticks_ms()
+        if ticks_diff(self.next_ain_ticks, now) <= 0:
+            self.next_ain_ticks = ticks_add(now, _AIN_POLL_MS)
+            self.read_analogue_input()
+        index = self.state.text_index
+        if index == self.compiled_index:
+            self.next_text = None
+        elif self.next_text is None or self.next_text[0] != index:
+            self.next_text = self.compile_text(index)
+
+    def wakeup_timeout(self):
+        # nothing blinks in this mode, but pending state has to be saved
+        if self.display_data_changed:
+            return self.display_delay()
+        return _SAVE_STATE_INTERVAL
+
+    def handle_start_of_sequence(self):
+        next_text = self.next_text
+        if next_text is not None:
+            self.next_text = None
+            self.use_text(next_text)
+        self.segment = -1
 
+    def handle_end_of_character(self):
+        self.segment += 1
+        (
+            self.mc,
+            self.next_segment_tick,
+            self.title,
+            self.mc_rendered,
+        ) = self.transitions[self.segment]
+        self.display_data_changed = True
+        self.title_only = False
+
+    @micropython.native
     def clock(self):
-        self.dit_tick = (self.dit_tick + 1) % self.dits_in_char
-        if self.dit_tick == 0:
+        pending = self.display_data_changed
+        tick = self.tick + 1
+        if tick >= self.length:
+            tick = 0
+        self.tick = tick
+        if tick == self.next_segment_tick:
+            if tick == 0:
+                self.handle_start_of_sequence()
             self.handle_end_of_character()
-        self.gate = self.gates[self.dit_tick]
-        self.update_cvs()
-
-    def update_cvs(self):
-        GATE_OUT.value(self.gate)
+        outputs = _outputs_at(self.output_frames, tick)
+        gate = outputs & 1
+        if gate != self.gate:
+            self.gate = gate
+            # the gate only shows in the title line
+            if not self.display_data_changed:
+                self.title_only = True
+                self.display_data_changed = True
+        # Only wake up the main loop if there is something new to paint. If a
+        # change is already pending, the main loop is waiting for the display
+        # delay and paints this one together with it.
+        if self.display_data_changed and not pending:
+            _WAKEUP.set()
+        # write the outputs, only those which changed
+        if gate != self._last_gate:
+            self._gate_value(gate)
+            self._last_gate = gate
+        end_flags = outputs >> 1
+        if end_flags != self._last_end_flags:
+            self._eoc_value(end_flags & 1)
+            self._eow_value((end_flags >> 1) & 1)
+            self._eom_value(end_flags >> 2)
+            self._last_end_flags = end_flags
+
+    def update_pitch(self):
         PITCH_OUT.voltage(self.state.pitch_cv)
-        EOC_OUT.value(
-            (self.mc == EOC_MC or self.mc == EOW_MC or self.mc == EOM_MC)
-            and self.dit_tick < EOC_GAP_LEN
-        )
-        EOW_OUT.value(
-            (self.mc == EOW_MC or self.mc == EOM_MC and self.dit_tick < EOW_GAP_LEN)
-        )
-        EOM_OUT.value(self.mc == EOM_MC)
 
     def paint_titleline(self):
-        x_center = int((oled.width - (len(self.current_char) * CHAR_WIDTH)) / 2)
-        x_for_prefix = len(self.prefix) * CHAR_WIDTH
-        x_current_char = min(max(x_center, x_for_prefix), oled.width - CHAR_WIDTH)
+        prefix, current_char, x_prefix, x_current_char = self.title
         y = 1
-        if len(self.prefix) > 0:
-            oled.text(f"{self.prefix}", x_current_char - x_for_prefix, y)
-        if self.gate or self.mc == EOM_MC:
-            oled.text(f"{self.current_char}", x_current_char, y)
+        if len(prefix) > 0:
+            _oled_text(prefix, x_prefix, y)
+        if self.gate or self.mc.kind == EOM_KIND:
+            _oled_text(current_char, x_current_char, y)
 
     def paint_content(self):
-        self.paint_centered_text(1, self.mc.sequence)
-        if self.mc == EOW_MC or self.mc == EOM_MC:
-            self.paint_centered_text(2, self.mc.char)
-
-
-class SubMode(Mode):
-    def __init__(self, name, main_mode):
-        super().__init__(name, main_mode.state)
-        self.main_mode = main_mode
-
-    def clock(self):
-        self.main_mode.clock()
-
-    def update_state(self):
-        super().update_state()
-        self.main_mode.update_state()
-
-    def update_cvs(self):
-        self.main_mode.update_cvs()
-
-    def paint_titleline(self):
-        self.main_mode.paint_titleline()
-
+        sequence, sequence_x, char, char_x = self.mc_rendered
+        self.paint_rendered(1, sequence, sequence_x)
+        if char is not None:
+            self.paint_rendered(2, char, char_x)
 
-class ChangeCV(SubMode):
-    def __init__(self, main_mode):
-        super().__init__("CHANGE_CV", main_mode)
-        self.old_cv = self.state.pitch_cv
-        self.current_cv = MIN_PITCH_CV + k1.range(PITCH_CV_STEPS + 1) / 12
 
-    def b1_klick(self):
-        return self.main_mode
-
-    def b2_klick(self):
-        if self.state.pitch_cv != self.old_cv:
-            self.state.pitch_cv = self.old_cv
-        return self.main_mode
-
-    def update_state(self):
-        super().update_state()
-        knob_cv = MIN_PITCH_CV + k1.range(PITCH_CV_STEPS + 1) / 12
-        if knob_cv != self.current_cv:
-            self.current_cv = knob_cv
-            self.state.pitch_cv = knob_cv
-            self.update_cvs()
+# The current mode and the flag to wake up the main loop, at module level so
+# that the input handlers reach them without going through the script object
+_MODE = [None]
+_WAKEUP = uasyncio.ThreadSafeFlag()
 
-    def paint_content(self):
-        self.paint_centered_text(1, f"CUR CV {self.old_cv:1.3f}")
-        self.paint_centered_text(2, f"NEW CV {self.state.pitch_cv:1.3f}")
-
-
-class ChangeText(SubMode):
-    def __init__(self, main_mode):
-        super().__init__("CHANGE_TEXT", main_mode)
-        self.current_index = k1.range(len(self.state.texts))
-        self.new_index = self.state.text_index
-        self.display_text_offset = 0
-        self.number_of_overflow_characters = (
-            len(self.state.texts[self.new_index]) - OLED_CHARS_PER_LINE
-        )
 
-    def b1_klick(self):
-        self.state.text_index = self.new_index
-        self.main_mode.reset_clock()
-        return self.main_mode
+def _set_mode(mode):
+    _MODE[0] = mode
+    # the clock of the mode is called directly by the din interrupt
+    din.handler(mode.clock)
+    mode.display_data_changed = True
+    _WAKEUP.set()
 
-    def b2_klick(self):
-        return self.main_mode
 
-    def update_state(self):
-        super().update_state()
-        index = k1.range(len(self.state.texts))
-        if index != self.current_index:
-            self.current_index = index
-            self.new_index = index
-            self.number_of_overflow_characters = (
-                len(self.state.texts[self.new_index]) - OLED_CHARS_PER_LINE
-            )
-            self.display_text_offset = 0
+def _b1_handler():
+    time_pressed = ticks_diff(ticks_ms(), b1.last_pressed())
+    mode = _MODE[0]
+    if time_pressed >= _LONG_PRESSED_INTERVAL:
+        _set_mode(mode.b1_long_press())
+    elif time_pressed >= _SHORT_PRESSED_INTERVAL:
+        _set_mode(mode.b1_short_press())
+    else:
+        _set_mode(mode.b1_klick())
 
-    def blink_triggered(self, blink_state):
-        if blink_state and self.number_of_overflow_characters > 0:
-            self.display_text_offset = (self.display_text_offset + 1) % (
-                self.number_of_overflow_characters + 1
-            )
 
-    def paint_content(self):
-        if self.blink_on:
-            self.paint_centered_text(1, "-->")
-        self.paint_centered_text(
-            2,
-            self.state.texts[self.new_index][
-                self.display_text_offset : self.display_text_offset
-                + OLED_CHARS_PER_LINE
-            ],
-        )
+def _b2_handler():
+    time_pressed = ticks_diff(ticks_ms(), b2.last_pressed())
+    mode = _MODE[0]
+    if time_pressed >= _LONG_PRESSED_INTERVAL:
+        _set_mode(mode.b2_long_press())
+    elif time_pressed >= _SHORT_PRESSED_INTERVAL:
+        _set_mode(mode.b2_short_press())
+    else:
+        _set_mode(mode.b2_klick())
 
 
 class Morse(EuroPiScript):
@@ -527,38 +443,16 @@ class Morse(EuroPiScript):
 
         self.load_state()
 
-        self.mode = Paused(self.state)
-
-        @din.handler
-        def din_handler():
-            self.mode.clock()
-
-        @b1.handler_falling
-        def b1_handler():
-            time_pressed = ticks_diff(ticks_ms(), b1.last_pressed())
-            if time_pressed >= LONG_PRESSED_INTERVAL:
-                self.mode = self.mode.b1_long_press()
-            elif time_pressed >= SHORT_PRESSED_INTERVAL:
-                self.mode = self.mode.b1_short_press()
-            else:
-                self.mode = self.mode.b1_klick()
-
-        @b2.handler_falling
-        def b2_handler():
-            time_pressed = ticks_diff(ticks_ms(), b2.last_pressed())
-            if time_pressed >= LONG_PRESSED_INTERVAL:
-                self.mode = self.mode.b2_long_press()
-            elif time_pressed >= SHORT_PRESSED_INTERVAL:
-                self.mode = self.mode.b2_short_press()
-            else:
-                self.mode = self.mode.b2_klick()
+        _set_mode(Paused(self.state))
+        b1.handler_falling(_b1_handler)
+        b2.handler_falling(_b2_handler)
 
     @classmethod
     def display_name(cls):
         return "Morse code"
 
     def save_state(self):
-        if self.state.saved or self.last_saved() < SAVE_STATE_INTERVAL:
+        if self.state.saved or self.last_saved() < _SAVE_STATE_INTERVAL:
             return
         self.save_state_str(self.state.serialize())
         self.state.saved = True
@@ -566,14 +460,24 @@ class Morse(EuroPiScript):
     def load_state(self):
         self.state = State(self.load_state_str())
 
+    async def main_loop(self):
+        # The loop only wakes up on input events or when the display has to
+        # be updated. Unsaved state is written on one of the following
+        # wakeups, which come at least every _SAVE_STATE_INTERVAL.
+        while True:
+            mode = _MODE[0]
+            mode.update_state()
+            mode.update_display()
+            self.save_state()
+            try:
+                await uasyncio.wait_for_ms(_WAKEUP.wait(), mode.wakeup_timeout())
+            except uasyncio.TimeoutError:
+                pass
+
     def main(self):
         oled.centre_text(f"EuroPi\nMorse Code\n{VERSION}")
         sleep(1)
-        while True:
-            self.mode.update_state()
-            self.mode.update_display()
-            self.save_state()
-            sleep(0.01)
+        uasyncio.run(self.main_loop())
 
 
 # Main script execution
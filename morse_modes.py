@@ -0,0 +1,230 @@
+"""
+Display and mode base classes for Euro Pi Morse
+author: Thomas Herrmann (github.com/thoherr)
+
+This module is separate from morse.py so that the adjustment modes in
+morse_submodes.py can use these classes without importing the script
+itself.
+
+"""
+
+import framebuf
+import micropython
+from utime import ticks_add, ticks_diff, ticks_ms
+from europi import oled, CHAR_WIDTH, CHAR_HEIGHT
+from micropython import const
+
+# Minimum time between two display updates
+_DISPLAY_INTERVAL_MS = const(50)
+
+_BLINK_MS = const(700)
+_BLINK_RATIO = const(2)
+_BLINK_ON_MS = const(_BLINK_MS // _BLINK_RATIO)
+_BLINK_OFF_MS = const(_BLINK_MS - _BLINK_ON_MS)
+
+# Maximum time between two polls of the knob in the adjustment modes
+_KNOB_POLL_MS = const(10)
+
+# Display properties
+OLED_WIDTH = oled.width
+OLED_CHARS_PER_LINE = OLED_WIDTH // CHAR_WIDTH
+
+# Height of the title line including its spacing
+TITLE_HEIGHT = CHAR_HEIGHT + 2
+
+# Bound display methods used on every repaint
+_oled_text = oled.text
+_oled_blit = oled.blit
+_oled_fill = oled.fill
+_oled_fill_rect = oled.fill_rect
+_oled_show = oled.show
+
+
+# FNV style multiply per word, so the same change at two positions doesn't cancel
+# out; the rotate carries the high bits of the product back into the low bits
+@micropython.viper
+def _checksum(buf: ptr32, words: int) -> uint:
+    checksum = uint(0x811C9DC5)
+    for i in range(words):
+        checksum = (checksum ^ uint(buf[i])) * uint(0x01000193)
+        checksum = (checksum << 5) | (checksum >> 27)
+    return checksum
+
+
+class Mode:
+    # time of the last display update, the mode which painted the whole frame
+    # buffer last and the checksum of the frame buffer content last sent to
+    # the display, shared by all modes
+    painted_ticks = ticks_ms()
+    painted_mode = None
+    shown_checksum = None
+
+    def __init__(self, name, state):
+        self.name = name
+        self.state = state
+        self.blink_on = False
+        self.next_blink_ticks = ticks_add(ticks_ms(), _BLINK_OFF_MS)
+        self.display_data_changed = True
+        # set together with display_data_changed if only the title line changed
+        self.title_only = False
+
+    def current_text(self):
+        state = self.state
+        return state.texts[state.text_index]
+
+    def clock(self):
+        pass
+
+    def reset_clock(self):
+        pass
+
+    def update_pitch(self):
+        pass
+
+    def b1_klick(self):
+        return self
+
+    def b1_short_press(self):
+        return self
+
+    def b1_long_press(self):
+        return self
+
+    def b2_klick(self):
+        return self
+
+    def b2_short_press(self):
+        return self
+
+    def b2_long_press(self):
+        return self
+
+    def blink_triggered(self, blink_state):
+        pass
+
+    def blink(self):
+        """Toggle blink_on when due."""
+        now = ticks_ms()
+        if ticks_diff(self.next_blink_ticks, now) <= 0:
+            self.blink_on = not self.blink_on
+            self.next_blink_ticks = ticks_add(
+                now, _BLINK_ON_MS if self.blink_on else _BLINK_OFF_MS
+            )
+            self.blink_triggered(self.blink_on)
+
+    def display_delay(self):
+        """Milliseconds until the display may be updated again."""
+        since_painted = ticks_diff(ticks_ms(), Mode.painted_ticks)
+        if 0 <= since_painted < _DISPLAY_INTERVAL_MS:
+            return _DISPLAY_INTERVAL_MS - since_painted
+        return 0
+
+    def wakeup_timeout(self):
+        """Milliseconds until the main loop has to run again.
+
+        This is the next blink toggle or a pending display update.
+        """
+        timeout = max(ticks_diff(self.next_blink_ticks, ticks_ms()), 0)
+        if self.display_data_changed:
+            timeout = min(timeout, self.display_delay())
+        return timeout
+
+    def update_state(self):
+        self.blink()
+
+    def text_windows(self, text):
+        """All parts of text which fit into one line of the display, for scrolling."""
+        return [
+            text[i : i + OLED_CHARS_PER_LINE]
+            for i in range(max(1, len(text) - OLED_CHARS_PER_LINE + 1))
+        ]
+
+    def scroll_windows(self):
+        """Advance display_text_offset to the next of the text windows."""
+        offset = self.display_text_offset + 1
+        if offset >= len(self.windows):
+            offset = 0
+        self.display_text_offset = offset
+
+    def centered_x(self, content):
+        return (OLED_WIDTH - len(content) * CHAR_WIDTH) >> 1
+
+    def paint_text(self, line, content, x):
+        _oled_text(content, x, line * (CHAR_HEIGHT + 1) + 1)
+
+    def render_text(self, content):
+        """Render content into a frame buffer to be painted with paint_rendered."""
+        width = len(content) * CHAR_WIDTH
+        rendered = framebuf.FrameBuffer(
+            bytearray(width * CHAR_HEIGHT // 8), width, CHAR_HEIGHT, framebuf.MONO_VLSB
+        )
+        rendered.text(content, 0, 0, 1)
+        return rendered
+
+    def paint_rendered(self, line, rendered, x):
+        _oled_blit(rendered, x, line * (CHAR_HEIGHT + 1) + 1)
+
+    def paint_centered_text(self, line, content):
+        self.paint_text(line, content, self.centered_x(content))
+
+    def paint_display(self):
+        self.paint_titleline()
+        self.paint_content()
+
+    def update_display(self):
+        if not self.display_data_changed or self.display_delay() > 0:
+            return
+        self.display_data_changed = False
+        Mode.painted_ticks = ticks_ms()
+        if self.title_only and Mode.painted_mode is self:
+            _oled_fill_rect(0, 0, OLED_WIDTH, TITLE_HEIGHT, 0)
+            self.paint_titleline()
+        else:
+            _oled_fill(0)
+            self.paint_display()
+            Mode.painted_mode = self
+        self.title_only = False
+        checksum = _checksum(oled.buffer, len(oled.buffer) >> 2)
+        if checksum != Mode.shown_checksum:
+            _oled_show()
+            Mode.shown_checksum = checksum
+
+
+class SubMode(Mode):
+    def __init__(self, name, main_mode):
+        super().__init__(name, main_mode.state)
+        self.main_mode = main_mode
+        self.next_knob_ticks = ticks_ms()
+
+    def clock(self):
+        self.main_mode.clock()
+
+    def update_state(self):
+        super().update_state()
+        self.main_mode.update_state()
+
+    def knob_due(self):
+        """True at most once every _KNOB_POLL_MS, when the knob should be read."""
+        now = ticks_ms()
+        if ticks_diff(self.next_knob_ticks, now) > 0:
+            return False
+        self.next_knob_ticks = ticks_add(now, _KNOB_POLL_MS)
+        return True
+
+    def wakeup_timeout(self):
+        # the knob has no interrupt, so we have to poll it
+        knob_timeout = max(ticks_diff(self.next_knob_ticks, ticks_ms()), 0)
+        return min(super().wakeup_timeout(), knob_timeout)
+
+    def update_pitch(self):
+        self.main_mode.update_pitch()
+
+    def update_display(self):
+        # our title line is painted by the main mode
+        if self.main_mode.display_data_changed:
+            self.main_mode.display_data_changed = False
+            self.display_data_changed = True
+        super().update_display()
+
+    def paint_titleline(self):
+        self.main_mode.paint_titleline()
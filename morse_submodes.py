@@ -0,0 +1,92 @@
+"""
+Parameter adjustment modes for Euro Pi Morse
+author: Thomas Herrmann (github.com/thoherr)
+
+These modes are only imported when they are entered the first time, so
+they do not take up RAM until they are used.
+
+"""
+
+from europi import k1
+from morse_modes import SubMode
+from morse_table import MIN_PITCH_CV, PITCH_CV_STEPS
+
+
+class ChangeCV(SubMode):
+    def __init__(self, main_mode):
+        super().__init__("CHANGE_CV", main_mode)
+        self.old_cv = self.state.pitch_cv
+        self.current_cv = MIN_PITCH_CV + k1.range(PITCH_CV_STEPS + 1) / 12
+        self.old_cv_text = f"CUR CV {self.old_cv:1.3f}"
+        # the new CV is the old one until the knob is turned
+        self.new_cv_text = "NEW" + self.old_cv_text[3:]
+        # the formatted CV values always have the same length
+        self.cv_text_x = self.centered_x(self.old_cv_text)
+
+    def b1_klick(self):
+        return self.main_mode
+
+    def b2_klick(self):
+        if self.state.pitch_cv != self.old_cv:
+            self.state.pitch_cv = self.old_cv
+            self.state.mark_dirty()
+            self.update_pitch()
+        return self.main_mode
+
+    def update_state(self):
+        super().update_state()
+        if not self.knob_due():
+            return
+        knob_cv = MIN_PITCH_CV + k1.range(PITCH_CV_STEPS + 1) / 12
+        if knob_cv != self.current_cv:
+            self.current_cv = knob_cv
+            self.state.pitch_cv = knob_cv
+            self.state.mark_dirty()
+            self.update_pitch()
+            self.new_cv_text = f"NEW CV {knob_cv:1.3f}"
+            self.display_data_changed = True
+
+    def paint_content(self):
+        self.paint_text(1, self.old_cv_text, self.cv_text_x)
+        self.paint_text(2, self.new_cv_text, self.cv_text_x)
+
+
+class ChangeText(SubMode):
+    def __init__(self, main_mode):
+        super().__init__("CHANGE_TEXT", main_mode)
+        self.current_index = k1.range(len(self.state.texts))
+        self.new_index = self.state.text_index
+        self.display_text_offset = 0
+        self.windows = self.text_windows(self.state.texts[self.new_index])
+
+    def b1_klick(self):
+        if self.new_index != self.state.text_index:
+            self.state.text_index = self.new_index
+            self.state.mark_dirty()
+        self.main_mode.reset_clock()
+        return self.main_mode
+
+    def b2_klick(self):
+        return self.main_mode
+
+    def update_state(self):
+        super().update_state()
+        if not self.knob_due():
+            return
+        index = k1.range(len(self.state.texts))
+        if index != self.current_index:
+            self.current_index = index
+            self.new_index = index
+            self.windows = self.text_windows(self.state.texts[self.new_index])
+            self.display_text_offset = 0
+            self.display_data_changed = True
+
+    def blink_triggered(self, blink_state):
+        if blink_state:
+            self.scroll_windows()
+        self.display_data_changed = True
+
+    def paint_content(self):
+        if self.blink_on:
+            self.paint_centered_text(1, "-->")
+        self.paint_centered_text(2, self.windows[self.display_text_offset])
@@ -0,0 +1,170 @@
+"""
+Morse code table for Euro Pi Morse
+author: Thomas Herrmann (github.com/thoherr)
+
+This module is separate from morse.py so that it can be frozen into the
+firmware (see manifest.py) even if morse.py itself is installed as a file,
+which keeps the table out of the RAM.
+
+"""
+
+from micropython import const
+
+# Morse code timing
+# See https://en.wikipedia.org/wiki/Morse_code#Representation,_timing,_and_speeds or
+#     https://de.wikipedia.org/wiki/Morsecode#Zeitschema_und_Veranschaulichung
+_DIT_LEN = const(1)
+_DAH_LEN = const(3 * _DIT_LEN)
+_SYM_GAP_LEN = const(_DIT_LEN)
+_EOC_GAP_LEN = const(3 * _DIT_LEN)
+_EOW_GAP_LEN = const(7 * _DIT_LEN)
+_EOM_GAP_LEN = const(7 * _DIT_LEN)
+
+# "Morse code is often at a frequency between 600 and 800 Hz"
+# (see https://www.johndcook.com/blog/2022/02/25/morse-code-in-musical-notation)
+# a good value is e.g. PITCH_CV = 4.33, which is roughly E4 (659 Hz)
+# So we make the pitch adjustable with K1 and give it some variablilty
+DEFAULT_PITCH_CV = 4.333  # roughly E4 (659 Hz)
+MIN_PITCH_CV = 3.250  # roughly Eb3 (311 Hz)
+MAX_PITCH_CV = 5.0  # roughly C5 (1047 Hz)
+PITCH_CV_STEPS = int((MAX_PITCH_CV - MIN_PITCH_CV) * 12)
+
+# Morse code encoding
+DIT = "."
+DAH = "_"
+SYM_GAP = " "
+
+# Length in dits and gate state of each symbol
+_SYMBOLS = {
+    SYM_GAP: (_SYM_GAP_LEN, False),
+    DIT: (_DIT_LEN, True),
+    DAH: (_DAH_LEN, True),
+}
+
+# Kinds of morse characters, ordered by the end-of gates they trigger
+_CHAR_KIND = const(0)
+_EOC_KIND = const(1)
+EOW_KIND = const(2)
+EOM_KIND = const(3)
+
+
+class MorseCharacter:
+    def __init__(self, char, sequence):
+        self.char = char
+        self.kind = {"EOC": _EOC_KIND, "EOW": EOW_KIND, "EOM": EOM_KIND}.get(
+            char, _CHAR_KIND
+        )
+        self.sequence = sequence
+        # One bit per dit, least significant bit first. Even the longest
+        # sequence fits into a small int, so no long int is allocated.
+        gates_bits = 0
+        duration = 0
+        for sym in sequence:
+            length, gate = _SYMBOLS[sym]
+            if gate:
+                gates_bits |= ((1 << length) - 1) << duration
+            duration += length
+        self.gates_bits = gates_bits
+        self.duration = duration
+        # end-of gates during this character, in the same layout as gates_bits
+        all_dits = (1 << duration) - 1
+        self.eoc_bits = (
+            all_dits & ((1 << _EOC_GAP_LEN) - 1) if self.kind >= _EOC_KIND else 0
+        )
+        self.eow_bits = (
+            all_dits & ((1 << _EOW_GAP_LEN) - 1) if self.kind >= EOW_KIND else 0
+        )
+        self.eom_bits = all_dits if self.kind == EOM_KIND else 0
+
+
+# The symbols of each character without the gaps between them. Only the
+# characters which are used get a MorseCharacter, see morse_code().
+_MORSE_TABLE = {
+    # latin letters
+    "A": "._",
+    "B": "_...",
+    "C": "_._.",
+    "D": "_..",
+    "E": ".",
+    "F": ".._.",
+    "G": "__.",
+    "H": "....",
+    "I": "..",
+    "J": ".___",
+    "K": "_._",
+    "L": "._..",
+    "M": "__",
+    "N": "_.",
+    "O": "___",
+    "P": ".__.",
+    "Q": "__._",
+    "R": "._.",
+    "S": "...",
+    "T": "_",
+    "U": ".._",
+    "V": "..._",
+    "W": ".__",
+    "X": "_.._",
+    "Y": "_.__",
+    "Z": "__..",
+    # digits
+    "1": ".____",
+    "2": "..___",
+    "3": "...__",
+    "4": "...._",
+    "5": ".....",
+    "6": "_....",
+    "7": "__...",
+    "8": "___..",
+    "9": "____.",
+    "0": "_____",
+    # umlauts and ligatures - not fully imlemented
+    "Á": ".__._",
+    "Ä": "._._",
+    "É": ".._..",
+    "Ñ": "__.__",
+    "Ö": "___.",
+    "Ü": "..__",
+    # symbols
+    ".": "._._._",  # AAA
+    ",": "__..__",  # MIM
+    ":": "___...",  # OS
+    ";": "_._._.",  # NNN
+    "?": "..__..",  # IMI
+    "!": "_._.__",
+    "-": "_...._",  # BA
+    "_": "..__._",  # UK
+    "(": "_.__.",  # KN
+    ")": "_.__._",  # KK
+    "'": ".____.",  # JN
+    "=": "_..._",  # BT
+    "+": "._._.",  # AR
+    "/": "_.._.",  # DN
+    "@": ".__._.",  # AC
+    '"': "._.._.",
+}
+
+_MORSE_CODE = {}
+
+
+def morse_code(char):
+    """The MorseCharacter of char, which is built on its first use.
+
+    Lower case letters are morsed like upper case ones, characters without
+    morse code get the error signal ERROR_MC.
+    """
+    mc = _MORSE_CODE.get(char)
+    if mc is None:
+        symbols = _MORSE_TABLE.get(char.upper())
+        if symbols is None:
+            mc = ERROR_MC
+        else:
+            mc = MorseCharacter(char, SYM_GAP.join(symbols))
+        _MORSE_CODE[char] = mc
+    return mc
+
+
+EOC_MC = MorseCharacter("EOC", SYM_GAP * _EOC_GAP_LEN)
+EOW_MC = MorseCharacter("EOW", SYM_GAP * _EOW_GAP_LEN)
+EOM_MC = MorseCharacter("EOM", SYM_GAP * _EOM_GAP_LEN)
+ERROR_MC = MorseCharacter("ERROR", ". . . . . . . .")